@@ -1,15 +1,51 @@
+import asyncio
 import datetime
+import functools
+import itertools
 import logging.config
 from environs import Env
 from seller import download_stock
 
+import pandas as pd
 import requests
 
-from seller import divide, price_conversion
+from seller import (
+    REQUEST_TIMEOUT,
+    create_session,
+    dump_json,
+    is_read_timeout,
+    load_json,
+    load_json_lazy,
+    price_conversion,
+    send_by_chunks,
+    stock_conversion,
+)
 
 logger = logging.getLogger(__file__)
 
 
+@functools.lru_cache(maxsize=None)
+def get_market_session(access_token):
+    """
+    Функция возвращает сессию для API Яндекс Маркета, общую для всех запросов с этим токеном.
+    Args:
+        access_token: Bearer token для аутентификации в API Яндекс Маркета.
+    Returns:
+        Объект `requests.Session` с заголовками авторизации Яндекс Маркета.
+    Examples:
+        >>> get_market_session("abcdefg12345") is get_market_session("abcdefg12345")
+        True
+    """
+
+    return create_session(
+        {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {access_token}",
+            "Accept": "application/json",
+        }
+    )
+
+
 def get_product_list(page, campaign_id, access_token):
     """
     Функция отправляет GET-запрос к API Яндекс Маркета для получения списка товаров.
@@ -19,6 +55,7 @@ def get_product_list(page, campaign_id, access_token):
         access_token: Bearer token для аутентификации в API Яндекс Маркета.
     Returns:
         Словарь, содержащий информацию о товарах, полученных от API Яндекс Маркета.
+        Если установлен pysimdjson, возвращается ленивый `simdjson.Object` с тем же методом `get`.
     Raises:
         requests.exceptions.HTTPError: Если HTTP статус ответа не 200 OK.
 
@@ -28,20 +65,15 @@ def get_product_list(page, campaign_id, access_token):
     """
 
     endpoint_url = "https://api.partner.market.yandex.ru/"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/json",
-        "Host": "api.partner.market.yandex.ru",
-    }
     payload = {
         "page_token": page,
         "limit": 200,
     }
     url = endpoint_url + f"campaigns/{campaign_id}/offer-mapping-entries"
-    response = requests.get(url, headers=headers, params=payload)
+    session = get_market_session(access_token)
+    response = session.get(url, params=payload, timeout=REQUEST_TIMEOUT)
     response.raise_for_status()
-    response_object = response.json()
+    response_object = load_json_lazy(response.content)
     return response_object.get("result")
 
 
@@ -64,17 +96,12 @@ def update_stocks(stocks, campaign_id, access_token):
     """
 
     endpoint_url = "https://api.partner.market.yandex.ru/"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/json",
-        "Host": "api.partner.market.yandex.ru",
-    }
     payload = {"skus": stocks}
     url = endpoint_url + f"campaigns/{campaign_id}/offers/stocks"
-    response = requests.put(url, headers=headers, json=payload)
+    session = get_market_session(access_token)
+    response = session.put(url, data=dump_json(payload), timeout=REQUEST_TIMEOUT)
     response.raise_for_status()
-    response_object = response.json()
+    response_object = load_json(response.content)
     return response_object
 
 
@@ -98,17 +125,12 @@ def update_price(prices, campaign_id, access_token):
     """
 
     endpoint_url = "https://api.partner.market.yandex.ru/"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/json",
-        "Host": "api.partner.market.yandex.ru",
-    }
     payload = {"offers": prices}
     url = endpoint_url + f"campaigns/{campaign_id}/offer-prices/updates"
-    response = requests.post(url, headers=headers, json=payload)
+    session = get_market_session(access_token)
+    response = session.post(url, data=dump_json(payload), timeout=REQUEST_TIMEOUT)
     response.raise_for_status()
-    response_object = response.json()
+    response_object = load_json(response.content)
     return response_object
 
 
@@ -129,16 +151,16 @@ def get_offer_ids(campaign_id, market_token):
     """
 
     page = ""
-    product_list = []
+    offer_ids = []
     while True:
         some_prod = get_product_list(page, campaign_id, market_token)
-        product_list.extend(some_prod.get("offerMappingEntries"))
+        offer_ids.extend(
+            product.get("offer").get("shopSku")
+            for product in some_prod.get("offerMappingEntries")
+        )
         page = some_prod.get("paging").get("nextPageToken")
         if not page:
             break
-    offer_ids = []
-    for product in product_list:
-        offer_ids.append(product.get("offer").get("shopSku"))
     return offer_ids
 
 
@@ -146,68 +168,56 @@ def create_stocks(watch_remnants, offer_ids, warehouse_id):
     """
     Функция сопоставляет данные об остатках часов с известными offer_id и формирует список словарей.
     Args:
-        watch_remnants: Список словарей, представляющих данные об остатках часов.
+        watch_remnants: Таблица `pandas.DataFrame` или список словарей, представляющих данные об остатках часов.
         offer_ids: Список строк, представляющих offer_id товаров, для которых необходимо обновить остатки.
         warehouse_id: Идентификатор склада в Яндекс Маркете.
     Returns:
-        Список словарей, где каждый словарь содержит данные об остатках для товара (sku, warehouseId, items)
-        в формате, требуемом API Яндекс Маркета.
+        Кортеж, содержащий два списка словарей с данными об остатках для товара (sku, warehouseId, items)
+        в формате, требуемом API Яндекс Маркета:
+        - `stocks`: Полный список остатков.
+        - `not_empty`: Товары с ненулевым остатком.
     Examples:
         >>> watch_remnants = [{"Код": "123-ABC", "Количество": "5"}, {"Код": "456-DEF", "Количество": ">10"}]
         >>> offer_ids = ["123-ABC", "456-DEF", "789-GHI"]
         >>> warehouse_id = 12345
-        >>> stocks = create_stocks(watch_remnants, offer_ids, warehouse_id)
+        >>> stocks, not_empty = create_stocks(watch_remnants, offer_ids, warehouse_id)
         >>> # Пример частичного результата (значения updatedAt будут отличаться)
         >>> #[{'sku': '123-ABC', 'warehouseId': 12345, 'items': [{'count': 5, 'type': 'FIT', 'updatedAt': '2023-10-27T10:00:00Z'}]
     """
 
-    stocks = list()
     date = str(datetime.datetime.utcnow().replace(microsecond=0).isoformat() + "Z")
-    for watch in watch_remnants:
-        if str(watch.get("Код")) in offer_ids:
-            count = str(watch.get("Количество"))
-            if count == ">10":
-                stock = 100
-            elif count == "1":
-                stock = 0
-            else:
-                stock = int(watch.get("Количество"))
-            stocks.append(
-                {
-                    "sku": str(watch.get("Код")),
-                    "warehouseId": warehouse_id,
-                    "items": [
-                        {
-                            "count": stock,
-                            "type": "FIT",
-                            "updatedAt": date,
-                        }
-                    ],
-                }
-            )
-            offer_ids.remove(str(watch.get("Код")))
-    for offer_id in offer_ids:
-        stocks.append(
-            {
-                "sku": offer_id,
-                "warehouseId": warehouse_id,
-                "items": [
-                    {
-                        "count": 0,
-                        "type": "FIT",
-                        "updatedAt": date,
-                    }
-                ],
-            }
-        )
-    return stocks
+    watches = pd.DataFrame(watch_remnants, columns=["Код", "Количество"])
+    codes = watches["Код"].astype(str)
+    found = codes.isin(offer_ids) & ~codes.duplicated()
+    found_codes = codes[found].tolist()
+    counts = stock_conversion(watches.loc[found, "Количество"])
+    stocks = [
+        {
+            "sku": code,
+            "warehouseId": warehouse_id,
+            "items": [{"count": stock, "type": "FIT", "updatedAt": date}],
+        }
+        for code, stock in zip(found_codes, counts.tolist())
+    ]
+    not_empty = list(itertools.compress(stocks, (counts != 0).tolist()))
+    remaining = set(offer_ids).difference(found_codes)
+    stocks.extend(
+        {
+            "sku": offer_id,
+            "warehouseId": warehouse_id,
+            "items": [{"count": 0, "type": "FIT", "updatedAt": date}],
+        }
+        for offer_id in dict.fromkeys(offer_ids)
+        if offer_id in remaining
+    )
+    return stocks, not_empty
 
 
 def create_prices(watch_remnants, offer_ids):
     """
     Функция сопоставляет данные о товарах с известными offer_id и формирует список словарей.
     Args:
-        watch_remnants: Список словарей, представляющих данные о товарах.
+        watch_remnants: Таблица `pandas.DataFrame` или список словарей, представляющих данные о товарах.
         offer_ids: Список строк, представляющих offer_id товаров, для которых необходимо обновить цены.
     Returns:
         Список словарей, где каждый словарь содержит данные о цене для товара (id, price, currencyId)
@@ -217,28 +227,33 @@ def create_prices(watch_remnants, offer_ids):
         >>> offer_ids = ["123-ABC", "456-DEF"]
         >>> create_prices(watch_remnants, offer_ids)
     """
-    prices = []
-    for watch in watch_remnants:
-        if str(watch.get("Код")) in offer_ids:
-            price = {
-                "id": str(watch.get("Код")),
-                "price": {
-                    "value": int(price_conversion(watch.get("Цена"))),
-                    "currencyId": "RUR",
-                },
-            }
-            prices.append(price)
+    watches = pd.DataFrame(watch_remnants, columns=["Код", "Цена"])
+    codes = watches["Код"].astype(str)
+    found = codes.isin(offer_ids)
+    values = watches.loc[found, "Цена"].map(price_conversion).astype(int)
+    prices = [
+        {
+            "id": code,
+            "price": {
+                "value": value,
+                "currencyId": "RUR",
+            },
+        }
+        for code, value in zip(codes[found].tolist(), values.tolist())
+    ]
     return prices
 
 
-async def upload_prices(watch_remnants, campaign_id, market_token):
+async def upload_prices(watch_remnants, campaign_id, market_token, offer_ids=None):
     """
     Функция получает список offer_id товаров, формирует данные о ценах на основе данных о товарах,
     и разделяет список цен на части размером не более 500 элементов.
     Args:
-        watch_remnants: Список словарей, представляющих данные о товарах.
+        watch_remnants: Таблица `pandas.DataFrame` с данными о товарах.
         campaign_id: Идентификатор кампании в Яндекс Маркете.
         market_token: Bearer token для аутентификации в API Яндекс Маркета.
+        offer_ids: Уже полученный список offer_id кампании. Если не передан, запрашивается
+                   через `get_offer_ids`.
     Returns:
         Список словарей, представляющих сформированные данные о ценах, которые были отправлены в API Яндекс Маркета.
     Raises:
@@ -249,22 +264,26 @@ async def upload_prices(watch_remnants, campaign_id, market_token):
         # (Предполагаемый результат: список словарей с ценами)
     """
 
-    offer_ids = get_offer_ids(campaign_id, market_token)
+    if offer_ids is None:
+        offer_ids = get_offer_ids(campaign_id, market_token)
     prices = create_prices(watch_remnants, offer_ids)
-    for some_prices in list(divide(prices, 500)):
-        update_price(some_prices, campaign_id, market_token)
+    await send_by_chunks(update_price, prices, 500, campaign_id, market_token)
     return prices
 
 
-async def upload_stocks(watch_remnants, campaign_id, market_token, warehouse_id):
+async def upload_stocks(
+    watch_remnants, campaign_id, market_token, warehouse_id, offer_ids=None
+):
     """
     Функция получает список offer_id товаров, формирует данные об остатках на основе данных о товарах,
     разделяет список остатков на части размером не более 2000 элементов.
     Args:
-        watch_remnants: Список словарей, представляющих данные о товарах.
+        watch_remnants: Таблица `pandas.DataFrame` с данными о товарах.
         campaign_id: Идентификатор кампании в Яндекс Маркете.
         market_token: Bearer token для аутентификации в API Яндекс Маркета.
         warehouse_id: Идентификатор склада в Яндекс Маркете.
+        offer_ids: Уже полученный список offer_id кампании. Если не передан, запрашивается
+                   через `get_offer_ids`.
     Returns:
         Кортеж, содержащий два списка словарей:
         - `not_empty`: Список товаров с ненулевым остатком.
@@ -277,28 +296,72 @@ async def upload_stocks(watch_remnants, campaign_id, market_token, warehouse_id)
         # (Предполагаемый результат: (список товаров с ненулевым остатком, полный список остатков))
     """
 
-    offer_ids = get_offer_ids(campaign_id, market_token)
-    stocks = create_stocks(watch_remnants, offer_ids, warehouse_id)
-    for some_stock in list(divide(stocks, 2000)):
-        update_stocks(some_stock, campaign_id, market_token)
-    not_empty = list(
-        filter(lambda stock: (stock.get("items")[0].get("count") != 0), stocks)
-    )
+    if offer_ids is None:
+        offer_ids = get_offer_ids(campaign_id, market_token)
+    stocks, not_empty = create_stocks(watch_remnants, offer_ids, warehouse_id)
+    await send_by_chunks(update_stocks, stocks, 2000, campaign_id, market_token)
     return not_empty, stocks
 
 
+async def process_campaign(watch_remnants, campaign_id, market_token, warehouse_id):
+    """
+    Функция получает offer_id кампании один раз и параллельно обновляет её остатки и цены.
+    Args:
+        watch_remnants: Таблица `pandas.DataFrame` с данными о товарах.
+        campaign_id: Идентификатор кампании в Яндекс Маркете.
+        market_token: Bearer token для аутентификации в API Яндекс Маркета.
+        warehouse_id: Идентификатор склада в Яндекс Маркете.
+    Raises:
+        Exception: Пробрасывает исключения, возникающие в функциях `get_offer_ids`, `upload_stocks` и `upload_prices`.
+    Examples:
+        # Пример асинхронного вызова функции (требует event loop)
+        # await process_campaign(watch_remnants, "12345", "abcdefg12345", 12345)
+    """
+
+    offer_ids = await asyncio.to_thread(get_offer_ids, campaign_id, market_token)
+    await asyncio.gather(
+        upload_stocks(
+            watch_remnants, campaign_id, market_token, warehouse_id, offer_ids
+        ),
+        upload_prices(watch_remnants, campaign_id, market_token, offer_ids),
+    )
+
+
+async def process_campaigns(watch_remnants, market_token, campaigns):
+    """
+    Функция параллельно обновляет остатки и цены нескольких кампаний Яндекс Маркета.
+    Args:
+        watch_remnants: Таблица `pandas.DataFrame` с данными о товарах.
+        market_token: Bearer token для аутентификации в API Яндекс Маркета.
+        campaigns: Список пар (идентификатор кампании, идентификатор склада).
+    Raises:
+        Exception: Пробрасывает первое исключение, возникшее в `process_campaign`.
+    Examples:
+        # asyncio.run(process_campaigns(watch_remnants, "abcdefg12345", [("12345", 1), ("67890", 2)]))
+    """
+
+    await asyncio.gather(
+        *[
+            process_campaign(watch_remnants, campaign_id, market_token, warehouse_id)
+            for campaign_id, warehouse_id in campaigns
+        ]
+    )
+
+
 def main():
     """Основная функция для скачивания остатков, формирования данных о ценах и остатках и обновления информации на Яндекс Маркете для FBS и DBS кампаний.
 
     Функция выполняет следующие шаги:
     1. Загружает переменные окружения MARKET_TOKEN, FBS_ID, DBS_ID, WAREHOUSE_FBS_ID и WAREHOUSE_DBS_ID.
     2. Скачивает данные об остатках товаров.
-    3. Получает список offer_id товаров для FBS кампании.
-    4. Формирует данные об остатках и отправляет их в API Яндекс Маркета для FBS кампании.
-    5. Формирует данные о ценах и отправляет их в API Яндекс Маркета для FBS кампании.
-    6. Повторяет шаги 3-5 для DBS кампании.
+    3. Получает список offer_id товаров для FBS и DBS кампаний.
+    4. Формирует данные об остатках и отправляет их в API Яндекс Маркета.
+    5. Формирует данные о ценах и отправляет их в API Яндекс Маркета.
+
+    FBS и DBS кампании обрабатываются параллельно.
 
-    Обрабатывает исключения, возникающие при работе с сетью (requests) и другие общие исключения.
+    Сообщает об ошибках сети (requests), оставшихся после повторных попыток; остальные исключения
+    пробрасываются.
     """
     env = Env()
     market_token = env.str("MARKET_TOKEN")
@@ -309,22 +372,16 @@ def main():
 
     watch_remnants = download_stock()
     try:
-        offer_ids = get_offer_ids(campaign_fbs_id, market_token)
-        stocks = create_stocks(watch_remnants, offer_ids, warehouse_fbs_id)
-        for some_stock in list(divide(stocks, 2000)):
-            update_stocks(some_stock, campaign_fbs_id, market_token)
-        upload_prices(watch_remnants, campaign_fbs_id, market_token)
-        offer_ids = get_offer_ids(campaign_dbs_id, market_token)
-        stocks = create_stocks(watch_remnants, offer_ids, warehouse_dbs_id)
-        for some_stock in list(divide(stocks, 2000)):
-            update_stocks(some_stock, campaign_dbs_id, market_token)
-        upload_prices(watch_remnants, campaign_dbs_id, market_token)
-    except requests.exceptions.ReadTimeout:
-        print("Превышено время ожидания...")
+        campaigns = [
+            (campaign_fbs_id, warehouse_fbs_id),
+            (campaign_dbs_id, warehouse_dbs_id),
+        ]
+        asyncio.run(process_campaigns(watch_remnants, market_token, campaigns))
     except requests.exceptions.ConnectionError as error:
-        print(error, "Ошибка соединения")
-    except Exception as error:
-        print(error, "ERROR_2")
+        if is_read_timeout(error):
+            print("Превышено время ожидания...")
+        else:
+            print(error, "Ошибка соединения")
 
 
 if __name__ == "__main__":
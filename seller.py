@@ -1,15 +1,170 @@
+import asyncio
+import functools
 import io
+import itertools
+import json
 import logging.config
-import os
-import re
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from environs import Env
 
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+try:
+    import python_calamine  # noqa: F401
+except ImportError:
+    EXCEL_ENGINE = None
+else:
+    EXCEL_ENGINE = "calamine"
 
 logger = logging.getLogger(__file__)
 
+REQUEST_TIMEOUT = (5, 30)
+UPLOAD_EXECUTOR = ThreadPoolExecutor(max_workers=8)
+
+NON_DIGITS = bytes(char for char in range(256) if not 48 <= char <= 57)
+
+
+def dump_json(obj) -> bytes:
+    """
+    Функция сериализует объект в JSON, используя orjson, если он установлен.
+    Args:
+        obj: Объект для сериализации (словарь или список).
+    Returns:
+        Байтовая строка с JSON в кодировке UTF-8.
+    Examples:
+        >>> dump_json({"stocks": []})
+        b'{"stocks":[]}'
+    """
+
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def load_json(content: bytes):
+    """
+    Функция разбирает JSON, используя orjson, если он установлен.
+    Args:
+        content: Байтовая строка с JSON, например `response.content`.
+    Returns:
+        Объект Python, соответствующий JSON.
+    Examples:
+        >>> load_json(b'{"result": {"items": []}}')
+        {'result': {'items': []}}
+    """
+
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def load_json_lazy(content: bytes):
+    """
+    Функция разбирает JSON лениво с помощью pysimdjson, если он установлен.
+
+    Вложенные объекты превращаются в объекты Python только при обращении к ним, поэтому
+    неиспользуемые поля большого ответа не создаются. Без pysimdjson используется `load_json`.
+    Args:
+        content: Байтовая строка с JSON, например `response.content`.
+    Returns:
+        Объект `simdjson.Object` с методом `get`, как у словаря, или обычный объект Python.
+    Examples:
+        >>> load_json_lazy(b'{"result": {"paging": {}}}').get("result").get("paging").get("nextPageToken")
+    """
+
+    if simdjson is not None:
+        return simdjson.Parser().parse(content)
+    return load_json(content)
+
+
+def create_session(headers):
+    """
+    Функция создаёт сессию requests с пулом соединений и повторами запросов.
+
+    Запросы, завершившиеся ошибкой соединения, таймаутом или статусом 429/5xx, повторяются
+    с экспоненциальной задержкой (с учётом заголовка Retry-After).
+    Args:
+        headers: Словарь заголовков, которые будут отправляться с каждым запросом сессии.
+    Returns:
+        Объект `requests.Session`, переиспользующий TCP/TLS соединения между запросами.
+    Examples:
+        >>> session = create_session({"Api-Key": "abcdefg12345"})
+        >>> session.get("https://api-seller.ozon.ru/", timeout=REQUEST_TIMEOUT)
+    """
+
+    session = requests.Session()
+    session.headers.update(headers)
+    retry = Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "PUT", "POST"],
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+    session.mount("https://", adapter)
+    return session
+
+
+def is_read_timeout(error):
+    """
+    Функция проверяет, вызвана ли ошибка соединения истечением времени ожидания ответа.
+
+    После исчерпания повторных попыток requests сообщает о таймауте чтения не как
+    `ReadTimeout`, а как `ConnectionError` с `ReadTimeoutError` из urllib3 внутри.
+    Args:
+        error: Исключение `requests.exceptions.ConnectionError`.
+    Returns:
+        True, если причина ошибки — `urllib3.exceptions.ReadTimeoutError`.
+    Examples:
+        >>> is_read_timeout(requests.exceptions.ConnectionError("Ошибка"))
+        False
+    """
+
+    cause = error.args[0] if error.args else None
+    return isinstance(cause, ReadTimeoutError) or isinstance(
+        getattr(cause, "reason", None), ReadTimeoutError
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def get_ozon_session(client_id, seller_token):
+    """
+    Функция возвращает сессию для API Ozon Seller, общую для всех запросов с этими ключами.
+    Args:
+        client_id: Идентификатор клиента Ozon Seller.
+        seller_token: Токен продавца Ozon Seller.
+    Returns:
+        Объект `requests.Session` с заголовками авторизации Ozon Seller.
+    Examples:
+        >>> get_ozon_session("12345", "abcdefg12345") is get_ozon_session("12345", "abcdefg12345")
+        True
+    """
+
+    return create_session(
+        {
+            "Client-Id": client_id,
+            "Api-Key": seller_token,
+            "Content-Type": "application/json",
+        }
+    )
+
 
 def get_product_list(last_id, client_id, seller_token):
     """
@@ -30,10 +185,6 @@ def get_product_list(last_id, client_id, seller_token):
     """
 
     url = "https://api-seller.ozon.ru/v2/product/list"
-    headers = {
-        "Client-Id": client_id,
-        "Api-Key": seller_token,
-    }
     payload = {
         "filter": {
             "visibility": "ALL",
@@ -41,9 +192,10 @@ def get_product_list(last_id, client_id, seller_token):
         "last_id": last_id,
         "limit": 1000,
     }
-    response = requests.post(url, json=payload, headers=headers)
+    session = get_ozon_session(client_id, seller_token)
+    response = session.post(url, data=dump_json(payload), timeout=REQUEST_TIMEOUT)
     response.raise_for_status()
-    response_object = response.json()
+    response_object = load_json(response.content)
     return response_object.get("result")
 
 
@@ -63,17 +215,14 @@ def get_offer_ids(client_id, seller_token):
     """
 
     last_id = ""
-    product_list = []
+    offer_ids = []
     while True:
         some_prod = get_product_list(last_id, client_id, seller_token)
-        product_list.extend(some_prod.get("items"))
+        offer_ids.extend(product.get("offer_id") for product in some_prod.get("items"))
         total = some_prod.get("total")
         last_id = some_prod.get("last_id")
-        if total == len(product_list):
+        if total == len(offer_ids):
             break
-    offer_ids = []
-    for product in product_list:
-        offer_ids.append(product.get("offer_id"))
     return offer_ids
 
 
@@ -96,14 +245,11 @@ def update_price(prices: list, client_id, seller_token):
     """
 
     url = "https://api-seller.ozon.ru/v1/product/import/prices"
-    headers = {
-        "Client-Id": client_id,
-        "Api-Key": seller_token,
-    }
     payload = {"prices": prices}
-    response = requests.post(url, json=payload, headers=headers)
+    session = get_ozon_session(client_id, seller_token)
+    response = session.post(url, data=dump_json(payload), timeout=REQUEST_TIMEOUT)
     response.raise_for_status()
-    return response.json()
+    return load_json(response.content)
 
 
 def update_stocks(stocks: list, client_id, seller_token):
@@ -125,73 +271,94 @@ def update_stocks(stocks: list, client_id, seller_token):
     """
 
     url = "https://api-seller.ozon.ru/v1/product/import/stocks"
-    headers = {
-        "Client-Id": client_id,
-        "Api-Key": seller_token,
-    }
     payload = {"stocks": stocks}
-    response = requests.post(url, json=payload, headers=headers)
+    session = get_ozon_session(client_id, seller_token)
+    response = session.post(url, data=dump_json(payload), timeout=REQUEST_TIMEOUT)
     response.raise_for_status()
-    return response.json()
+    return load_json(response.content)
 
 
 def download_stock():
     """
     Функция скачивает ZIP-архив с сайта Timeworld.
     Returns:
-        Список словарей, где каждый словарь представляет собой информацию об остатках
+        Таблица `pandas.DataFrame`, где каждая строка представляет собой информацию об остатках
         одной модели часов Casio.
     Raises:
         requests.exceptions.HTTPError: Если HTTP статус ответа при скачивании архива не 200 OK.
     """
 
     casio_url = "https://timeworld.ru/upload/files/ostatki.zip"
-    session = requests.Session()
-    response = session.get(casio_url)
-    response.raise_for_status()
-    with response, zipfile.ZipFile(io.BytesIO(response.content)) as archive:
-        archive.extractall(".")
-    excel_file = "ostatki.xls"
-    watch_remnants = pd.read_excel(
-        io=excel_file,
-        na_values=None,
-        keep_default_na=False,
-        header=17,
-    ).to_dict(orient="records")
-    os.remove("./ostatki.xls")
+    session = create_session({})
+    archive_content = io.BytesIO()
+    with session.get(casio_url, stream=True, timeout=REQUEST_TIMEOUT) as response:
+        response.raise_for_status()
+        for block in response.iter_content(chunk_size=1 << 16):
+            archive_content.write(block)
+    with zipfile.ZipFile(archive_content) as archive:
+        with archive.open("ostatki.xls") as excel_file:
+            watch_remnants = pd.read_excel(
+                io=excel_file,
+                engine=EXCEL_ENGINE,
+                na_values=None,
+                keep_default_na=False,
+                header=17,
+            )
     return watch_remnants
 
 
+def stock_conversion(counts: pd.Series) -> pd.Series:
+    """Эта функция преобразует столбец «Количество» из файла остатков в числовые остатки.
+    Args:
+        counts: Столбец с количеством товара («>10», «1» или число).
+    Returns:
+        Столбец целых чисел: «>10» становится 100, «1» становится 0, остальные значения
+        переводятся в int.
+    Examples:
+        >>> stock_conversion(pd.Series([">10", "1", "5"])).tolist()
+        [100, 0, 5]
+    """
+
+    return counts.astype(str).replace({">10": "100", "1": "0"}).astype(int)
+
+
 def create_stocks(watch_remnants, offer_ids):
     """
     Функция сопоставляет данные об остатках часов с известными offer_id и формирует список словарей.
     Args:
-        watch_remnants: Список словарей, представляющих данные об остатках часов.
+        watch_remnants: Таблица `pandas.DataFrame` или список словарей, представляющих данные об остатках часов.
         offer_ids: Список строк, представляющих offer_id товаров, для которых необходимо обновить остатки.
     Returns:
-        Список словарей, где каждый словарь содержит `offer_id` и `stock` (остаток) для отправки в API Ozon.
+        Кортеж, содержащий два списка словарей с `offer_id` и `stock` (остаток) для отправки в API Ozon:
+        - `stocks`: Полный список остатков.
+        - `not_empty`: Товары с ненулевым остатком.
     Examples:
         >>> watch_remnants = [{"Код": "123-ABC", "Количество": "5"}, {"Код": "456-DEF", "Количество": ">10"}]
         >>> offer_ids = ["123-ABC", "456-DEF", "789-GHI"]
-        >>> create_stocks(watch_remnants, offer_ids)
+        >>> stocks, not_empty = create_stocks(watch_remnants, offer_ids)
+        >>> stocks
         [{'offer_id': '123-ABC', 'stock': 5}, {'offer_id': '456-DEF', 'stock': 100}, {'offer_id': '789-GHI', 'stock': 0}]
+        >>> not_empty
+        [{'offer_id': '123-ABC', 'stock': 5}, {'offer_id': '456-DEF', 'stock': 100}]
     """
 
-    stocks = []
-    for watch in watch_remnants:
-        if str(watch.get("Код")) in offer_ids:
-            count = str(watch.get("Количество"))
-            if count == ">10":
-                stock = 100
-            elif count == "1":
-                stock = 0
-            else:
-                stock = int(watch.get("Количество"))
-            stocks.append({"offer_id": str(watch.get("Код")), "stock": stock})
-            offer_ids.remove(str(watch.get("Код")))
-    for offer_id in offer_ids:
-        stocks.append({"offer_id": offer_id, "stock": 0})
-    return stocks
+    watches = pd.DataFrame(watch_remnants, columns=["Код", "Количество"])
+    codes = watches["Код"].astype(str)
+    found = codes.isin(offer_ids) & ~codes.duplicated()
+    found_codes = codes[found].tolist()
+    counts = stock_conversion(watches.loc[found, "Количество"])
+    stocks = [
+        {"offer_id": code, "stock": stock}
+        for code, stock in zip(found_codes, counts.tolist())
+    ]
+    not_empty = list(itertools.compress(stocks, (counts != 0).tolist()))
+    remaining = set(offer_ids).difference(found_codes)
+    stocks.extend(
+        {"offer_id": offer_id, "stock": 0}
+        for offer_id in dict.fromkeys(offer_ids)
+        if offer_id in remaining
+    )
+    return stocks, not_empty
 
 
 def create_prices(watch_remnants, offer_ids):
@@ -201,7 +368,7 @@ def create_prices(watch_remnants, offer_ids):
     `price_conversion` для преобразования цены в нужный формат.
 
     Args:
-        watch_remnants: Список словарей, представляющих данные о товарах.
+        watch_remnants: Таблица `pandas.DataFrame` или список словарей, представляющих данные о товарах.
         offer_ids: Список строк, представляющих offer_id товаров, для которых необходимо обновить цены.
 
     Returns:
@@ -215,17 +382,20 @@ def create_prices(watch_remnants, offer_ids):
         [{'auto_action_enabled': 'UNKNOWN', 'currency_code': 'RUB', 'offer_id': '123-ABC', 'old_price': '0', 'price': '5990'}]
     """
 
-    prices = []
-    for watch in watch_remnants:
-        if str(watch.get("Код")) in offer_ids:
-            price = {
-                "auto_action_enabled": "UNKNOWN",
-                "currency_code": "RUB",
-                "offer_id": str(watch.get("Код")),
-                "old_price": "0",
-                "price": price_conversion(watch.get("Цена")),
-            }
-            prices.append(price)
+    watches = pd.DataFrame(watch_remnants, columns=["Код", "Цена"])
+    codes = watches["Код"].astype(str)
+    found = codes.isin(offer_ids)
+    values = watches.loc[found, "Цена"].map(price_conversion)
+    prices = [
+        {
+            "auto_action_enabled": "UNKNOWN",
+            "currency_code": "RUB",
+            "offer_id": code,
+            "old_price": "0",
+            "price": value,
+        }
+        for code, value in zip(codes[found].tolist(), values.tolist())
+    ]
     return prices
 
 
@@ -242,7 +412,8 @@ def price_conversion(price: str) -> str:
         '1234'  # Убираем все кроме цифр перед точкой
     """
 
-    return re.sub("[^0-9]", "", price.split(".")[0])
+    integer_part = price.split(".", 1)[0].encode("ascii", "ignore")
+    return integer_part.translate(None, NON_DIGITS).decode()
 
 
 def divide(lst: list, n: int):
@@ -265,13 +436,43 @@ def divide(lst: list, n: int):
         yield lst[i : i + n]
 
 
-async def upload_prices(watch_remnants, client_id, seller_token):
+async def send_by_chunks(update, items, size, *args):
+    """
+    Функция разбивает список на части и отправляет их в API параллельно в пуле потоков.
+    Пул `UPLOAD_EXECUTOR` общий для всех вызовов, поэтому одновременно выполняется не более
+    8 запросов, даже если остатки и цены отправляются параллельно.
+    Args:
+        update: Функция отправки одной части, например `update_stocks` или `update_price`.
+        items: Список словарей для отправки.
+        size: Максимальный размер одной части.
+        *args: Дополнительные аргументы для `update` (идентификаторы и токены).
+    Returns:
+        Список ответов API в порядке следования частей.
+    Raises:
+        Exception: Пробрасывает первое исключение, возникшее в функции `update`.
+    Examples:
+        # Пример асинхронного вызова функции (требует event loop)
+        # await send_by_chunks(update_stocks, stocks, 100, "client_id", "seller_token")
+    """
+
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(
+        *[
+            loop.run_in_executor(UPLOAD_EXECUTOR, update, chunk, *args)
+            for chunk in divide(items, size)
+        ]
+    )
+
+
+async def upload_prices(watch_remnants, client_id, seller_token, offer_ids=None):
     """
     Функция получает список offer_id товаров, формирует данные о ценах на основе данных о товарах.
     Args:
-        watch_remnants: Список словарей, представляющих данные о товарах.
+        watch_remnants: Таблица `pandas.DataFrame` с данными о товарах.
         client_id: Идентификатор клиента Ozon Seller.
         seller_token: Токен продавца Ozon Seller.
+        offer_ids: Уже полученный список offer_id магазина. Если не передан, запрашивается
+                   через `get_offer_ids`.
     Returns:
         Список словарей, представляющих сформированные данные о ценах, которые были отправлены в API Ozon.
     Raises:
@@ -282,22 +483,24 @@ async def upload_prices(watch_remnants, client_id, seller_token):
         # (Предполагаемый результат: список словарей с ценами)
     """
 
-    offer_ids = get_offer_ids(client_id, seller_token)
+    if offer_ids is None:
+        offer_ids = get_offer_ids(client_id, seller_token)
     prices = create_prices(watch_remnants, offer_ids)
-    for some_price in list(divide(prices, 1000)):
-        update_price(some_price, client_id, seller_token)
+    await send_by_chunks(update_price, prices, 1000, client_id, seller_token)
     return prices
 
 
-async def upload_stocks(watch_remnants, client_id, seller_token):
+async def upload_stocks(watch_remnants, client_id, seller_token, offer_ids=None):
     """
     Функция получает список offer_id товаров, формирует данные об остатках на основе данных о товарах,
     разделяет список остатков на части размером не более 100 элементов, и отправляет запросы к API
     Ozon для обновления информации об остатках.
     Args:
-        watch_remnants: Список словарей, представляющих данные о товарах.
+        watch_remnants: Таблица `pandas.DataFrame` с данными о товарах.
         client_id: Идентификатор клиента Ozon Seller.
         seller_token: Токен продавца Ozon Seller.
+        offer_ids: Уже полученный список offer_id магазина. Если не передан, запрашивается
+                   через `get_offer_ids`.
     Returns:
         Кортеж, содержащий два списка словарей:
         - `not_empty`: Список товаров с ненулевым остатком.
@@ -311,14 +514,34 @@ async def upload_stocks(watch_remnants, client_id, seller_token):
         # (Предполагаемый результат: (список товаров с ненулевым остатком, полный список остатков))
     """
 
-    offer_ids = get_offer_ids(client_id, seller_token)
-    stocks = create_stocks(watch_remnants, offer_ids)
-    for some_stock in list(divide(stocks, 100)):
-        update_stocks(some_stock, client_id, seller_token)
-    not_empty = list(filter(lambda stock: (stock.get("stock") != 0), stocks))
+    if offer_ids is None:
+        offer_ids = get_offer_ids(client_id, seller_token)
+    stocks, not_empty = create_stocks(watch_remnants, offer_ids)
+    await send_by_chunks(update_stocks, stocks, 100, client_id, seller_token)
     return not_empty, stocks
 
 
+async def process_store(watch_remnants, client_id, seller_token, offer_ids):
+    """
+    Функция параллельно обновляет остатки и цены магазина Ozon.
+    Args:
+        watch_remnants: Таблица `pandas.DataFrame` с данными о товарах.
+        client_id: Идентификатор клиента Ozon Seller.
+        seller_token: Токен продавца Ozon Seller.
+        offer_ids: Список offer_id товаров магазина.
+    Raises:
+        Exception: Пробрасывает первое исключение, возникшее в `upload_stocks` или `upload_prices`.
+    Examples:
+        # Пример асинхронного вызова функции (требует event loop)
+        # await process_store(watch_remnants, "client_id", "seller_token", offer_ids)
+    """
+
+    await asyncio.gather(
+        upload_stocks(watch_remnants, client_id, seller_token, offer_ids),
+        upload_prices(watch_remnants, client_id, seller_token, offer_ids),
+    )
+
+
 def main():
     """Основная функция для скачивания остатков, формирования данных о ценах и остатках и обновления информации на Ozon.
 
@@ -329,7 +552,10 @@ def main():
     4. Формирует данные об остатках и отправляет их в API Ozon.
     5. Формирует данные о ценах и отправляет их в API Ozon.
 
-    Обрабатывает исключения, возникающие при работе с сетью (requests) и другие общие исключения.
+    Остатки и цены отправляются параллельно.
+
+    Сообщает об ошибках сети (requests), оставшихся после повторных попыток; остальные исключения
+    пробрасываются.
     """
 
     env = Env()
@@ -338,18 +564,14 @@ def main():
     try:
         offer_ids = get_offer_ids(client_id, seller_token)
         watch_remnants = download_stock()
-        stocks = create_stocks(watch_remnants, offer_ids)
-        for some_stock in list(divide(stocks, 100)):
-            update_stocks(some_stock, client_id, seller_token)
-        prices = create_prices(watch_remnants, offer_ids)
-        for some_price in list(divide(prices, 900)):
-            update_price(some_price, client_id, seller_token)
-    except requests.exceptions.ReadTimeout:
-        print("Превышено время ожидания...")
+        asyncio.run(process_store(watch_remnants, client_id, seller_token, offer_ids))
     except requests.exceptions.ConnectionError as error:
+        if is_read_timeout(error):
+            print("Превышено время ожидания...")
+        else:
+            print(error, "Ошибка соединения")
+    except requests.exceptions.ChunkedEncodingError as error:
         print(error, "Ошибка соединения")
-    except Exception as error:
-        print(error, "ERROR_2")
 
 
 if __name__ == "__main__":